@@ -4,11 +4,19 @@ from src.inventory import add_item, load_inventory, remove_item
 from src.cart_view import render_cart
 from src.matcher import (
     SOURCE_MEALDB,
-    match_recipes,
-    match_recipes_by_ingredient,
+    match_recipes_by_ingredient_within_budget,
+    match_recipes_within_budget,
     normalize_item,
 )
 from src.styles import apply_styles
+from src import tracing
+
+
+class PartialMatches(Exception):
+    def __init__(self, matches):
+        super().__init__("partial recipe matches")
+        self.matches = matches
+
 
 st.set_page_config(page_title="Recipe Finder", page_icon="RF", layout="wide")
 
@@ -40,6 +48,10 @@ with st.sidebar:
         default=[SOURCE_MEALDB],
     )
 
+    debug_timings = st.checkbox(
+        "Show debug timings", value=tracing.enabled_by_default(), key="debug_timings"
+    )
+
 st.title("Recipe Finder")
 st.caption("Find recipes based on what you already have in your kitchen.")
 
@@ -89,41 +101,91 @@ with fridge_container:
             st.info("Add some ingredients to start.")
 
 st.subheader("Recipe suggestions")
-if not inventory:
-    st.warning("Add ingredients to your fridge to see recipes.")
-else:
-    with st.spinner("Finding the best recipes..."):
-        @st.cache_data(show_spinner=False, ttl=600)
-        def _cached_matches(items: tuple[str, ...], missing: int, srcs: tuple[str, ...]):
-            return match_recipes(items, max_missing=missing, sources=srcs)
-
-        required = normalize_item(required_ingredient)
-        if required:
-            @st.cache_data(show_spinner=False, ttl=600)
-            def _cached_required(req: str, items: tuple[str, ...]):
-                return match_recipes_by_ingredient(req, items)
-
-            matches = _cached_required(required, tuple(inventory))
-        else:
-            matches = _cached_matches(tuple(inventory), max_missing, tuple(sources))
-
-    if not matches:
-        st.info("No recipes found with the current filters.")
+with tracing.run("recipe_finder", enabled=debug_timings) as trace:
+    if trace is not None:
+        st.session_state["last_trace"] = trace
+    if not inventory:
+        st.warning("Add ingredients to your fridge to see recipes.")
     else:
-        cards = st.columns(3)
-        for i, match in enumerate(matches):
-            with cards[i % 3]:
-                st.markdown(f"### {match.name}")
-                st.caption(match.source)
-                if match.thumbnail:
-                    st.image(match.thumbnail, width=180)
-
-                if match.missing:
-                    st.warning(f"Missing ({len(match.missing)}): {', '.join(match.missing)}")
+        with st.spinner("Finding the best recipes..."), tracing.span("match"):
+            @st.cache_data(show_spinner=False, ttl=600)
+            def _cached_matches(items: tuple[str, ...], missing: int, srcs: tuple[str, ...]):
+                matches, complete = match_recipes_within_budget(
+                    items, max_missing=missing, sources=srcs
+                )
+                if not complete:
+                    # st.cache_data doesn't cache exceptions, so partial
+                    # results are shown once and retried on the next rerun.
+                    raise PartialMatches(matches)
+                return matches
+
+            required = normalize_item(required_ingredient)
+            if required:
+                @st.cache_data(show_spinner=False, ttl=600)
+                def _cached_required(req: str, items: tuple[str, ...]):
+                    matches, complete = match_recipes_by_ingredient_within_budget(req, items)
+                    if not complete:
+                        raise PartialMatches(matches)
+                    return matches
+
+            complete = True
+            try:
+                if required:
+                    matches = _cached_required(required, tuple(inventory))
                 else:
-                    st.success("You have everything for this recipe!")
+                    matches = _cached_matches(tuple(inventory), max_missing, tuple(sources))
+            except PartialMatches as partial:
+                matches = partial.matches
+                complete = False
 
-                st.caption(f"Ingredients: {', '.join(match.ingredients)}")
+        if not complete:
+            st.info("TheMealDB is slow or unavailable right now, showing partial results.")
 
-                if match.details_url:
-                    st.link_button("View recipe", match.details_url)
+        if not matches:
+            st.info("No recipes found with the current filters.")
+        else:
+            with tracing.span("render"):
+                cards = st.columns(3)
+                for i, match in enumerate(matches):
+                    with cards[i % 3]:
+                        st.markdown(f"### {match.name}")
+                        st.caption(match.source)
+                        if match.thumbnail:
+                            st.image(match.thumbnail, width=180)
+
+                        if match.missing:
+                            st.warning(f"Missing ({len(match.missing)}): {', '.join(match.missing)}")
+                        else:
+                            st.success("You have everything for this recipe!")
+
+                        st.caption(f"Ingredients: {', '.join(match.ingredients)}")
+
+                        if match.details_url:
+                            st.link_button("View recipe", match.details_url)
+
+last_trace = st.session_state.get("last_trace")
+if debug_timings and last_trace is not None:
+    with st.sidebar:
+        with st.expander("Debug timings", expanded=True):
+            st.caption(f"Last run: {last_trace.duration * 1000:.1f} ms")
+            st.dataframe(last_trace.breakdown(), hide_index=True, use_container_width=True)
+            ratios = last_trace.hit_ratios()
+            if ratios:
+                st.caption(
+                    "Cache hit ratio: "
+                    + ", ".join(f"{tier} {ratio:.0%}" for tier, ratio in ratios.items())
+                )
+            if last_trace.counters:
+                st.json(last_trace.counters, expanded=False)
+            st.download_button(
+                "Export JSON lines",
+                tracing.to_jsonl(last_trace),
+                file_name="trace.jsonl",
+                mime="application/x-ndjson",
+            )
+            st.download_button(
+                "Export Prometheus",
+                tracing.to_prometheus(last_trace),
+                file_name="trace.prom",
+                mime="text/plain",
+            )
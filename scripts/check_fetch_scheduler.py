@@ -0,0 +1,192 @@
+"""Exercise the TheMealDB fetch scheduler and matcher fallbacks offline.
+
+Installs a fake ``requests`` module and a throwaway SQLite cache, then checks
+that a slow API doesn't cost results already in the cache, that an open
+circuit matches from cache only, the half-open probe, and which errors count
+against the breaker.
+
+    python scripts/check_fetch_scheduler.py
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import threading
+import time
+import types
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class _RequestException(Exception):
+    pass
+
+
+class _Timeout(_RequestException):
+    pass
+
+
+class _HTTPError(_RequestException):
+    pass
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, payload: Any = None) -> None:
+        self.status_code = status_code
+        self._payload = payload
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise _HTTPError(str(self.status_code))
+
+    def json(self) -> Any:
+        return self._payload
+
+
+class FakeHTTP:
+    def __init__(self) -> None:
+        self.handler: Callable[[str, dict, float], FakeResponse] = self.hang
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str, params: dict | None = None, timeout: float = 0) -> FakeResponse:
+        with self._lock:
+            self.calls += 1
+        return self.handler(url, params or {}, timeout)
+
+    @staticmethod
+    def hang(url: str, params: dict, timeout: float) -> FakeResponse:
+        time.sleep(timeout)
+        raise _Timeout(url)
+
+
+http = FakeHTTP()
+fake_requests = types.ModuleType("requests")
+fake_requests.RequestException = _RequestException
+fake_requests.Timeout = _Timeout
+fake_requests.HTTPError = _HTTPError
+fake_requests.get = http.get
+sys.modules["requests"] = fake_requests
+
+from src import api_themealdb, cache_db, fetch_scheduler, matcher  # noqa: E402
+from src.fetch_scheduler import CircuitBreaker, FetchScheduler  # noqa: E402
+
+CACHED_MEALS = 20  # matcher caps candidates at 20 per ingredient
+
+
+def _reset(scheduler: FetchScheduler, stale: bool = False) -> None:
+    cache_db.DB_PATH = Path(tempfile.mkdtemp()) / "cache.db"
+    meals = [{"idMeal": str(i)} for i in range(CACHED_MEALS)]
+    cache_db.set_cached_filter("egg", meals)
+    for meal in meals:
+        cache_db.set_cached_meal(
+            meal["idMeal"], {"strMeal": f"Meal {meal['idMeal']}", "strIngredient1": "egg"}
+        )
+    if stale:
+        with cache_db._connect() as conn:
+            conn.execute("UPDATE meals SET updated_at = 0")
+            conn.execute("UPDATE ingredient_map SET updated_at = 0")
+    api_themealdb._get_cached.cache_clear()
+    fetch_scheduler.get_scheduler = lambda: scheduler
+    http.handler = FakeHTTP.hang
+    http.calls = 0
+
+
+def check_slow_api_keeps_cached_results() -> None:
+    scheduler = FetchScheduler(rate=1000, burst=1000)
+    _reset(scheduler)
+    # "egg" is cached; "tofu" isn't, and its filter call hangs for the whole budget.
+    started = time.monotonic()
+    results, complete = matcher.match_recipes_within_budget(["egg", "tofu"], budget_s=1.0)
+    elapsed = time.monotonic() - started
+    assert len(results) == CACHED_MEALS, len(results)
+    assert not complete, "tofu was skipped, the run should be partial"
+    assert elapsed < 1.5, f"took {elapsed:.2f}s on a 1s budget"
+
+
+def check_budget_clipped_timeout_not_a_failure() -> None:
+    scheduler = FetchScheduler(rate=1000, burst=1000, failure_threshold=2)
+    _reset(scheduler)
+    url = api_themealdb._base_url() + "/lookup.php"
+    for _ in range(4):
+        with fetch_scheduler.deadline_scope(time.monotonic() + 0.02):
+            try:
+                scheduler.get_json(url)
+            except fetch_scheduler.DeadlineExceeded:
+                pass
+            else:
+                raise AssertionError("expected DeadlineExceeded")
+    assert scheduler.breaker(url).state == CircuitBreaker.CLOSED
+
+
+def check_circuit_open_uses_cache_only() -> None:
+    scheduler = FetchScheduler(rate=1000, burst=1000, failure_threshold=1)
+    _reset(scheduler, stale=True)
+    scheduler.breaker(api_themealdb._base_url()).record_failure()
+    results, complete = matcher.match_recipes_within_budget(["egg"], budget_s=1.0)
+    assert http.calls == 0, f"{http.calls} HTTP calls with the circuit open"
+    assert len(results) == CACHED_MEALS, "stale cache rows should still match"
+    assert complete
+
+
+def check_half_open_single_probe() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow(), "first probe should pass"
+    assert not breaker.allow(), "only one probe at a time"
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def check_throttling_and_server_errors_trip_breaker() -> None:
+    scheduler = FetchScheduler(rate=1000, burst=1000, failure_threshold=2)
+    _reset(scheduler)
+    statuses = iter([429, 503])
+    http.handler = lambda url, params, timeout: FakeResponse(next(statuses))
+    url = api_themealdb._base_url() + "/lookup.php"
+    for _ in range(2):
+        try:
+            scheduler.get_json(url)
+        except fetch_scheduler.FetchFailed:
+            pass
+    assert scheduler.breaker(url).state == CircuitBreaker.OPEN
+    try:
+        scheduler.get_json(url)
+    except fetch_scheduler.CircuitOpen:
+        pass
+    else:
+        raise AssertionError("expected CircuitOpen")
+    assert http.calls == 2
+
+
+def main() -> int:
+    checks = [
+        check_slow_api_keeps_cached_results,
+        check_budget_clipped_timeout_not_a_failure,
+        check_circuit_open_uses_cache_only,
+        check_half_open_single_probe,
+        check_throttling_and_server_errors_trip_breaker,
+    ]
+    failed = 0
+    for check in checks:
+        try:
+            check()
+        except AssertionError as exc:
+            failed += 1
+            print(f"FAIL {check.__name__}: {exc}")
+        else:
+            print(f"ok   {check.__name__}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Guard the cold-start import cost of the app's own modules.
+
+Runs ``python -X importtime`` on the modules the Streamlit pages import and
+fails when a heavy client (supabase, requests, dotenv) is pulled in at import
+time or when the cumulative import time goes over budget.
+
+    python scripts/check_importtime.py [--budget-ms 100] [--runs 5]
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+MODULES = ("src.inventory", "src.cart", "src.matcher")
+HEAVY_MODULES = ("supabase", "requests", "dotenv")
+
+
+def _measure() -> dict[str, int]:
+    code = "import " + ", ".join(MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    best: dict[str, int] = {}
+    for _ in range(args.runs):
+        for name, value in _measure().items():
+            best[name] = min(value, best.get(name, value))
+
+    heavy = sorted(name for name in best if name.split(".")[0] in HEAVY_MODULES)
+    total_ms = sum(best.get(name, 0) for name in MODULES) / 1000
+
+    for name in MODULES:
+        print(f"{name:<16} {best.get(name, 0) / 1000:8.1f} ms")
+    print(f"{'total':<16} {total_ms:8.1f} ms (budget {args.budget_ms:.1f} ms)")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
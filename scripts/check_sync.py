@@ -0,0 +1,132 @@
+"""Exercise the Supabase sync layer against an in-process fake backend.
+
+Checks that SyncedTable only sends deltas, serves reads from its snapshot
+within the poll interval, and picks up changes made by other clients.
+
+    python scripts/check_sync.py
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.sync import SyncedTable  # noqa: E402
+
+TABLE = "inventory_items"
+
+
+class MemoryBackend:
+    def __init__(self) -> None:
+        self.tables: dict[str, set[str]] = {}
+        self.versions: dict[str, int] = {}
+        self.calls: list[tuple[str, list[str]]] = []
+        self._lock = threading.Lock()
+
+    def fetch(self, table: str) -> list[str]:
+        with self._lock:
+            self.calls.append(("fetch", []))
+            return sorted(self.tables.get(table, set()))
+
+    def version(self, table: str) -> int:
+        with self._lock:
+            return self.versions.get(table, 0)
+
+    def insert(self, table: str, items: list[str]) -> None:
+        with self._lock:
+            self.calls.append(("insert", items))
+            self.tables.setdefault(table, set()).update(items)
+            self.versions[table] = self.versions.get(table, 0) + 1
+
+    def delete(self, table: str, items: list[str]) -> None:
+        with self._lock:
+            self.calls.append(("delete", items))
+            self.tables.setdefault(table, set()).difference_update(items)
+            self.versions[table] = self.versions.get(table, 0) + 1
+
+    def writes(self) -> list[tuple[str, list[str]]]:
+        return [call for call in self.calls if call[0] != "fetch"]
+
+
+def check_replace_sends_deltas() -> None:
+    backend = MemoryBackend()
+    table = SyncedTable(backend, TABLE)
+    table.replace(["Milk", "eggs", "ham"])
+    backend.calls.clear()
+    table.replace(["eggs", "ham", "butter"])
+    assert backend.writes() == [("delete", ["milk"]), ("insert", ["butter"])], backend.calls
+    assert table.items() == ["butter", "eggs", "ham"]
+    assert backend.tables[TABLE] == {"butter", "eggs", "ham"}
+
+
+def check_reads_served_from_snapshot() -> None:
+    backend = MemoryBackend()
+    backend.insert(TABLE, ["eggs"])
+    table = SyncedTable(backend, TABLE, poll_interval=60)
+    assert table.items() == ["eggs"]
+    backend.calls.clear()
+    for _ in range(5):
+        table.items()
+    assert backend.calls == [], backend.calls
+
+
+def check_poll_picks_up_remote_change() -> None:
+    backend = MemoryBackend()
+    table = SyncedTable(backend, TABLE, poll_interval=0.05)
+    assert table.items() == []
+    backend.insert(TABLE, ["ham"])
+    assert table.items() == [], "change seen before the poll interval passed"
+    time.sleep(0.06)
+    assert table.items() == ["ham"]
+
+
+def check_add_after_remote_delete() -> None:
+    backend = MemoryBackend()
+    table = SyncedTable(backend, TABLE, poll_interval=60)
+    table.add("ham")
+    assert table.items() == ["ham"]
+    backend.delete(TABLE, ["ham"])
+    table.add("ham")
+    assert backend.tables[TABLE] == {"ham"}, "add lost behind a stale snapshot"
+
+
+def check_remote_write_racing_own_write() -> None:
+    backend = MemoryBackend()
+    table = SyncedTable(backend, TABLE, poll_interval=60)
+    table.items()
+    original_insert = backend.insert
+
+    def insert_with_remote_write(name: str, items: list[str]) -> None:
+        original_insert(name, items)
+        original_insert(name, ["remote"])
+
+    backend.insert = insert_with_remote_write  # type: ignore[method-assign]
+    table.add("local")
+    assert table.items() == ["local", "remote"], table.items()
+
+
+def main() -> int:
+    checks = [
+        check_replace_sends_deltas,
+        check_reads_served_from_snapshot,
+        check_poll_picks_up_remote_change,
+        check_add_after_remote_delete,
+        check_remote_write_racing_own_write,
+    ]
+    failed = 0
+    for check in checks:
+        try:
+            check()
+        except AssertionError as exc:
+            failed += 1
+            print(f"FAIL {check.__name__}: {exc}")
+        else:
+            print(f"ok   {check.__name__}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,15 @@
 from __future__ import annotations
 
-import os
 from functools import lru_cache
 from typing import Any, Tuple
 
-import requests
-from dotenv import load_dotenv
+from . import cache_db, config, fetch_scheduler, tracing
 
-from . import cache_db
+DEFAULT_BASE_URL = "https://www.themealdb.com/api/json/v1/1"
 
-load_dotenv()
 
-BASE_URL = os.getenv("THEMEALDB_BASE_URL", "https://www.themealdb.com/api/json/v1/1")
+def _base_url() -> str:
+    return config.get("THEMEALDB_BASE_URL", DEFAULT_BASE_URL)
 
 
 def _freeze_params(params: dict[str, str] | None) -> Tuple[Tuple[str, str], ...]:
@@ -22,30 +20,50 @@ def _freeze_params(params: dict[str, str] | None) -> Tuple[Tuple[str, str], ...]
 
 @lru_cache(maxsize=256)
 def _get_cached(path: str, params_items: Tuple[Tuple[str, str], ...]) -> dict[str, Any]:
-    url = f"{BASE_URL}/{path}"
-    response = requests.get(url, params=dict(params_items), timeout=15)
-    response.raise_for_status()
-    return response.json()
+    tracing.incr("cache.memory.miss")
+    url = f"{_base_url()}/{path}"
+    return fetch_scheduler.get_scheduler().get_json(url, params=dict(params_items))
 
 
 def _get(path: str, params: dict[str, str] | None = None) -> dict[str, Any]:
+    tracing.incr("cache.memory.lookup")
     return _get_cached(path, _freeze_params(params))
 
 
-def filter_by_ingredient(ingredient: str) -> list[dict[str, str]]:
-    cached = cache_db.get_cached_filter(ingredient)
+def is_available() -> bool:
+    return fetch_scheduler.get_scheduler().is_available(_base_url())
+
+
+def filter_by_ingredient(
+    ingredient: str, cache_only: bool = False
+) -> list[dict[str, str]] | None:
+    # In cache-only mode stale rows are still better than nothing, and a miss
+    # returns None so callers can tell it apart from "no meals".
+    max_age = None if cache_only else cache_db.CACHE_TTL_SECONDS
+    with tracing.span("sqlite"):
+        cached = cache_db.get_cached_filter(ingredient, max_age=max_age)
     if cached is not None:
+        tracing.incr("cache.sqlite.hit")
         return cached
+    tracing.incr("cache.sqlite.miss")
+    if cache_only:
+        return None
     data = _get("filter.php", {"i": ingredient})
     meals = data.get("meals") or []
     cache_db.set_cached_filter(ingredient, meals)
     return meals
 
 
-def lookup_meal(meal_id: str) -> dict[str, Any] | None:
-    cached = cache_db.get_cached_meal(meal_id)
+def lookup_meal(meal_id: str, cache_only: bool = False) -> dict[str, Any] | None:
+    max_age = None if cache_only else cache_db.CACHE_TTL_SECONDS
+    with tracing.span("sqlite"):
+        cached = cache_db.get_cached_meal(meal_id, max_age=max_age)
     if cached is not None:
+        tracing.incr("cache.sqlite.hit")
         return cached
+    tracing.incr("cache.sqlite.miss")
+    if cache_only:
+        return None
     data = _get("lookup.php", {"i": meal_id})
     meals = data.get("meals") or []
     if meals:
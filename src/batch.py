@@ -0,0 +1,232 @@
+"""Match many inventories at once, offline, against the local recipe cache.
+
+Reads one inventory per line of NDJSON, e.g.
+
+    {"id": "household-1", "items": ["chicken", "rice"], "max_missing": 2}
+
+and writes one line per inventory with its matches, in input order:
+
+    python -m src.batch households.ndjson -o matches.ndjson --workers 8
+
+Only meals already in ``recipes_cache.db`` are considered; nothing is fetched
+from TheMealDB. The cache is first compacted into a read-only index file that
+every worker process opens memory-mapped, so the OS shares one copy of it.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator
+
+from . import cache_db
+from .matcher import RecipeMatch, meal_ingredients, normalize_items, score_meal, sort_matches
+
+INDEX_PATH = cache_db.DB_PATH.with_name("recipes_index.db")
+LIMIT_PER_INGREDIENT = 20
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+def build_index(cache_path: Path = cache_db.DB_PATH, index_path: Path = INDEX_PATH) -> Path:
+    tmp_path = index_path.with_suffix(".tmp")
+    tmp_path.unlink(missing_ok=True)
+    source = sqlite3.connect(f"file:{cache_path}?mode=ro", uri=True)
+    target = sqlite3.connect(tmp_path)
+    try:
+        target.executescript(
+            """
+            CREATE TABLE meals (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                thumbnail TEXT NOT NULL,
+                ingredients TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE candidates (
+                ingredient TEXT NOT NULL,
+                meal_id TEXT NOT NULL,
+                PRIMARY KEY (ingredient, meal_id)
+            ) WITHOUT ROWID;
+            """
+        )
+        for meal_id, payload in source.execute("SELECT id, payload FROM meals"):
+            meal = json.loads(payload)
+            ingredients = meal_ingredients(meal)
+            if ingredients is None:
+                continue
+            target.execute(
+                "INSERT INTO meals VALUES (?, ?, ?, ?)",
+                (
+                    meal_id,
+                    meal.get("strMeal", "Unknown"),
+                    meal.get("strMealThumb", ""),
+                    json.dumps(ingredients),
+                ),
+            )
+        for ingredient, payload in source.execute("SELECT ingredient, payload FROM ingredient_map"):
+            meals = json.loads(payload)[:LIMIT_PER_INGREDIENT]
+            target.executemany(
+                "INSERT OR IGNORE INTO candidates VALUES (?, ?)",
+                [(ingredient, meal["idMeal"]) for meal in meals if meal.get("idMeal")],
+            )
+        target.commit()
+    finally:
+        source.close()
+        target.close()
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+def _cache_mtime(cache_path: Path) -> float:
+    # The cache runs in WAL mode: new rows land in the -wal file and the main
+    # file's mtime only moves on checkpoint, so both have to be considered.
+    wal_path = cache_path.with_name(cache_path.name + "-wal")
+    paths = [path for path in (cache_path, wal_path) if path.exists()]
+    return max(path.stat().st_mtime for path in paths)
+
+
+def ensure_index(cache_path: Path = cache_db.DB_PATH, index_path: Path = INDEX_PATH) -> Path:
+    if not index_path.exists() or index_path.stat().st_mtime < _cache_mtime(cache_path):
+        build_index(cache_path, index_path)
+    return index_path
+
+
+_index: sqlite3.Connection | None = None
+
+
+def _open_index(index_path: str) -> None:
+    global _index
+    _index = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+    _index.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    _index.execute("PRAGMA query_only=ON")
+
+
+def match_inventory(items: Iterable[str], max_missing: int = 3) -> list[RecipeMatch]:
+    assert _index is not None, "index not opened"
+    inventory = normalize_items(items)
+    if not inventory:
+        return []
+    inventory_set = set(inventory)
+    placeholders = ",".join("?" * len(inventory))
+    rows = _index.execute(
+        f"""
+        SELECT id, name, thumbnail, ingredients FROM meals
+        WHERE id IN (SELECT meal_id FROM candidates WHERE ingredient IN ({placeholders}))
+        """,
+        inventory,
+    ).fetchall()
+
+    results: list[RecipeMatch] = []
+    for meal_id, name, thumbnail, payload in rows:
+        match = score_meal(
+            meal_id, name, thumbnail, json.loads(payload), inventory_set, max_missing
+        )
+        if match is not None:
+            results.append(match)
+    sort_matches(results)
+    return results
+
+
+def _validate(record: Any) -> tuple[list[str], int]:
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    items = record.get("items", [])
+    if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+        raise ValueError("items must be a list of strings")
+    max_missing = record.get("max_missing", 3)
+    if not isinstance(max_missing, int) or isinstance(max_missing, bool) or max_missing < 0:
+        raise ValueError("max_missing must be a non-negative integer")
+    return items, max_missing
+
+
+def _match_lines(lines: list[str]) -> list[str]:
+    # A bad record becomes an error line of its own instead of failing the
+    # whole chunk (and with it the batch).
+    out: list[str] = []
+    for line in lines:
+        record_id = None
+        try:
+            record = json.loads(line)
+            if isinstance(record, dict):
+                record_id = record.get("id")
+            items, max_missing = _validate(record)
+        except ValueError as exc:
+            out.append(json.dumps({"id": record_id, "error": str(exc)}))
+            continue
+        matches = match_inventory(items, max_missing)
+        out.append(json.dumps({"id": record_id, "matches": [asdict(m) for m in matches]}))
+    return out
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[list[str]]:
+    stripped = (line for line in lines if line.strip())
+    while chunk := list(islice(stripped, size)):
+        yield chunk
+
+
+def run_batch(
+    source: IO[str],
+    sink: IO[str],
+    workers: int | None = None,
+    chunk_size: int = 64,
+    index_path: Path = INDEX_PATH,
+) -> int:
+    workers = workers or os.cpu_count() or 1
+    # Keep a bounded number of chunks in flight so memory stays flat no
+    # matter how long the input is, while results still come out in order.
+    in_flight: deque[Future[list[str]]] = deque()
+    written = 0
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_open_index, initargs=(str(index_path),)
+    ) as executor:
+        for chunk in _chunks(source, chunk_size):
+            in_flight.append(executor.submit(_match_lines, chunk))
+            if len(in_flight) >= workers * 2:
+                written += _drain(in_flight.popleft(), sink)
+        while in_flight:
+            written += _drain(in_flight.popleft(), sink)
+    return written
+
+
+def _drain(future: Future[list[str]], sink: IO[str]) -> int:
+    lines = future.result()
+    for line in lines:
+        sink.write(line + "\n")
+    return len(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Match NDJSON inventories against the recipe cache.")
+    parser.add_argument("input", nargs="?", default="-", help="NDJSON inventories (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON matches (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--rebuild-index", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.rebuild_index:
+        build_index()
+    else:
+        ensure_index()
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        written = run_batch(source, sink, workers=args.workers, chunk_size=args.chunk_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    print(f"wrote {written} results", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
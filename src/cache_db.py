@@ -6,6 +6,8 @@ import time
 from pathlib import Path
 from typing import Any
 
+from . import tracing
+
 DB_PATH = Path(__file__).resolve().parents[1] / "recipes_cache.db"
 CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
 
@@ -38,7 +40,7 @@ def init_db() -> None:
         )
 
 
-def get_cached_meal(meal_id: str) -> dict[str, Any] | None:
+def get_cached_meal(meal_id: str, max_age: int | None = CACHE_TTL_SECONDS) -> dict[str, Any] | None:
     init_db()
     with _connect() as conn:
         row = conn.execute(
@@ -46,8 +48,9 @@ def get_cached_meal(meal_id: str) -> dict[str, Any] | None:
         ).fetchone()
     if not row:
         return None
+    tracing.incr("sqlite.rows_read")
     payload, updated_at = row
-    if int(time.time()) - int(updated_at) > CACHE_TTL_SECONDS:
+    if max_age is not None and int(time.time()) - int(updated_at) > max_age:
         return None
     return json.loads(payload)
 
@@ -61,7 +64,9 @@ def set_cached_meal(meal_id: str, payload: dict[str, Any]) -> None:
         )
 
 
-def get_cached_filter(ingredient: str) -> list[dict[str, Any]] | None:
+def get_cached_filter(
+    ingredient: str, max_age: int | None = CACHE_TTL_SECONDS
+) -> list[dict[str, Any]] | None:
     init_db()
     with _connect() as conn:
         row = conn.execute(
@@ -70,8 +75,9 @@ def get_cached_filter(ingredient: str) -> list[dict[str, Any]] | None:
         ).fetchone()
     if not row:
         return None
+    tracing.incr("sqlite.rows_read")
     payload, updated_at = row
-    if int(time.time()) - int(updated_at) > CACHE_TTL_SECONDS:
+    if max_age is not None and int(time.time()) - int(updated_at) > max_age:
         return None
     return json.loads(payload)
 
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _load() -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def get(name: str, default: str = "") -> str:
+    _load()
+    return os.getenv(name, default)
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Iterator
+from urllib.parse import urlsplit
+
+from . import config, tracing
+
+DEFAULT_TIMEOUT_SECONDS = 15.0
+
+
+class FetchUnavailable(Exception):
+    pass
+
+
+class CircuitOpen(FetchUnavailable):
+    pass
+
+
+class DeadlineExceeded(FetchUnavailable):
+    pass
+
+
+class FetchFailed(FetchUnavailable):
+    pass
+
+
+# Deadlines are per thread: the matcher sets one in each worker before it calls
+# into the API module, and every HTTP call made underneath honours it.
+_local = threading.local()
+
+
+@contextmanager
+def deadline_scope(deadline: float | None) -> Iterator[None]:
+    previous = getattr(_local, "deadline", None)
+    if previous is not None and (deadline is None or previous < deadline):
+        deadline = previous
+    _local.deadline = deadline
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+def current_deadline() -> float | None:
+    return getattr(_local, "deadline", None)
+
+
+def remaining(deadline: float | None = None) -> float | None:
+    deadline = current_deadline() if deadline is None else deadline
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, deadline: float | None = None) -> bool:
+        while True:
+            wait = self._reserve()
+            if wait == 0.0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._state = self.CLOSED
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_after:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_after or self._probing:
+                return False
+            # Let a single probe through once the cool-down has passed.
+            self._probing = True
+            return True
+
+    def release(self) -> None:
+        # The call ended without telling us anything about the host.
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class FetchScheduler:
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: float = 10.0,
+        failure_threshold: int = 5,
+        reset_after: float = 30.0,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    ) -> None:
+        self.timeout = timeout
+        self._bucket = TokenBucket(rate, burst)
+        self._failure_threshold = failure_threshold
+        self._reset_after = reset_after
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self._failure_threshold, self._reset_after)
+                self._breakers[host] = breaker
+            return breaker
+
+    def is_available(self, url: str) -> bool:
+        return self.breaker(url).state != CircuitBreaker.OPEN
+
+    def get_json(self, url: str, params: dict[str, str] | None = None) -> Any:
+        import requests
+
+        breaker = self.breaker(url)
+        if breaker.state == CircuitBreaker.OPEN:
+            tracing.incr("fetch.circuit_open")
+            raise CircuitOpen(url)
+
+        deadline = current_deadline()
+        if not self._bucket.acquire(deadline):
+            tracing.incr("fetch.deadline_exceeded")
+            raise DeadlineExceeded(url)
+        timeout = self.timeout
+        left = remaining(deadline)
+        if left is not None:
+            if left <= 0:
+                tracing.incr("fetch.deadline_exceeded")
+                raise DeadlineExceeded(url)
+            timeout = min(timeout, left)
+
+        if not breaker.allow():
+            tracing.incr("fetch.circuit_open")
+            raise CircuitOpen(url)
+
+        started = time.perf_counter()
+        try:
+            try:
+                with tracing.span("http"):
+                    response = requests.get(url, params=params, timeout=timeout)
+            finally:
+                # Failed and timed-out calls are the slow ones; record them too.
+                tracing.observe("http.latency_seconds", time.perf_counter() - started)
+                tracing.incr("http.requests")
+            if response.status_code == 429 or response.status_code >= 500:
+                response.raise_for_status()
+        except requests.Timeout as exc:
+            if timeout < self.timeout:
+                # We cut this call short to fit the caller's budget; that says
+                # nothing about the host, so the breaker isn't told.
+                breaker.release()
+                tracing.incr("fetch.deadline_exceeded")
+                raise DeadlineExceeded(url) from exc
+            breaker.record_failure()
+            tracing.incr("fetch.failures")
+            raise FetchFailed(url) from exc
+        except requests.RequestException as exc:
+            breaker.record_failure()
+            tracing.incr("fetch.failures")
+            raise FetchFailed(url) from exc
+        breaker.record_success()
+        try:
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as exc:
+            raise FetchFailed(url) from exc
+
+
+@lru_cache(maxsize=1)
+def get_scheduler() -> FetchScheduler:
+    return FetchScheduler(
+        rate=float(config.get("THEMEALDB_RATE_PER_SECOND", "5")),
+        burst=float(config.get("THEMEALDB_BURST", "10")),
+    )
@@ -4,7 +4,7 @@ import json
 from pathlib import Path
 from typing import Iterable
 
-from . import supabase_store
+from . import storage
 
 DEFAULT_INVENTORY = {"items": []}
 
@@ -14,8 +14,9 @@ def _inventory_path() -> Path:
 
 
 def load_inventory() -> list[str]:
-    if supabase_store.is_enabled():
-        return supabase_store.list_items("inventory_items")
+    store = storage.remote_store()
+    if store is not None:
+        return store.list_items("inventory_items")
     path = _inventory_path()
     if not path.exists():
         save_inventory([])
@@ -26,8 +27,9 @@ def load_inventory() -> list[str]:
 
 
 def save_inventory(items: Iterable[str]) -> None:
-    if supabase_store.is_enabled():
-        supabase_store.replace_items("inventory_items", items)
+    store = storage.remote_store()
+    if store is not None:
+        store.replace_items("inventory_items", items)
         return
     path = _inventory_path()
     cleaned = sorted({item.strip().lower() for item in items if item.strip()})
@@ -36,8 +38,9 @@ def save_inventory(items: Iterable[str]) -> None:
 
 
 def add_item(item: str) -> list[str]:
-    if supabase_store.is_enabled():
-        supabase_store.add_item("inventory_items", item)
+    store = storage.remote_store()
+    if store is not None:
+        store.add_item("inventory_items", item)
         return load_inventory()
     items = load_inventory()
     items.append(item)
@@ -46,8 +49,9 @@ def add_item(item: str) -> list[str]:
 
 
 def remove_item(item: str) -> list[str]:
-    if supabase_store.is_enabled():
-        supabase_store.remove_item("inventory_items", item)
+    store = storage.remote_store()
+    if store is not None:
+        store.remove_item("inventory_items", item)
         return load_inventory()
     items = [i for i in load_inventory() if i != item.strip().lower()]
     save_inventory(items)
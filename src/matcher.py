@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Iterable
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from typing import Any, Iterable
 
-from . import api_themealdb
+from . import api_themealdb, fetch_scheduler, tracing
 
 
 @dataclass
@@ -21,6 +22,8 @@ class RecipeMatch:
 
 SOURCE_MEALDB = "TheMealDB"
 
+MATCH_BUDGET_SECONDS = 10.0
+
 
 _MEASURE_WORDS = {
     "cup",
@@ -90,6 +93,11 @@ def _normalize_ingredient(text: str) -> str:
 
 
 def _normalize_list(items: Iterable[str]) -> list[str]:
+    with tracing.span("normalize"):
+        return _normalize_list_untraced(items)
+
+
+def _normalize_list_untraced(items: Iterable[str]) -> list[str]:
     normalized = {_normalize_ingredient(item) for item in items if item.strip()}
     return sorted({item for item in normalized if item})
 
@@ -99,109 +107,255 @@ def normalize_item(text: str) -> str:
     return normalized[0] if normalized else ""
 
 
+def normalize_items(items: Iterable[str]) -> list[str]:
+    return _normalize_list(items)
+
+
+def meal_ingredients(meal: dict[str, Any]) -> list[str] | None:
+    category = (meal.get("strCategory") or "").strip().lower()
+    if category in _EXCLUDE_CATEGORIES:
+        return None
+    return _normalize_list(api_themealdb.parse_ingredients(meal))
+
+
+# The one place the matching rule lives: the app and the batch CLI both go
+# through here. ``ingredients`` must already be normalized (meal_ingredients).
+def score_meal(
+    meal_id: str,
+    name: str,
+    thumbnail: str,
+    ingredients: list[str],
+    inventory_set: set[str],
+    max_missing: int | None,
+) -> RecipeMatch | None:
+    missing = [i for i in ingredients if i not in inventory_set and i not in _IGNORE_SPICES]
+    if max_missing is not None and len(missing) > max_missing:
+        return None
+    return RecipeMatch(
+        id=meal_id,
+        name=name,
+        thumbnail=thumbnail,
+        ingredients=ingredients,
+        missing=missing,
+        source=SOURCE_MEALDB,
+        details_url=f"https://www.themealdb.com/meal/{meal_id}",
+    )
+
+
+def sort_matches(results: list[RecipeMatch]) -> None:
+    results.sort(key=lambda r: (len(r.missing), r.name.lower(), r.source))
+
+
+def _score_cached_meal(
+    meal_id: str, meal: dict[str, Any] | None, inventory_set: set[str], max_missing: int | None
+) -> RecipeMatch | None:
+    if not meal:
+        return None
+    ingredients = meal_ingredients(meal)
+    if ingredients is None:
+        return None
+    return score_meal(
+        meal_id,
+        meal.get("strMeal", "Unknown"),
+        meal.get("strMealThumb", ""),
+        ingredients,
+        inventory_set,
+        max_missing,
+    )
+
+
+# When TheMealDB can't be reached (circuit open, deadline, request error) the
+# fallbacks read the SQLite cache regardless of age. Anything not cached at all
+# is reported as skipped so the caller can mark the run as partial.
+def _filter_with_fallback(ingredient: str) -> tuple[list[dict[str, str]], bool]:
+    if api_themealdb.is_available():
+        try:
+            return api_themealdb.filter_by_ingredient(ingredient), False
+        except fetch_scheduler.FetchUnavailable:
+            tracing.incr("match.cache_only_fallbacks")
+    meals = api_themealdb.filter_by_ingredient(ingredient, cache_only=True)
+    if meals is None:
+        tracing.incr("match.skipped")
+        return [], True
+    return meals, False
+
+
+def _candidate_scores(
+    ingredients: Iterable[str], limit_per_ingredient: int = 20
+) -> tuple[dict[str, int], bool]:
+    scores: dict[str, int] = {}
+    complete = True
+    with tracing.span("candidate_meal_ids"):
+        for ingredient in ingredients:
+            meals, skipped = _filter_with_fallback(ingredient)
+            complete = complete and not skipped
+            for meal in meals[:limit_per_ingredient]:
+                meal_id = meal.get("idMeal")
+                if meal_id:
+                    scores[meal_id] = scores.get(meal_id, 0) + 1
+    tracing.incr("match.candidates", len(scores))
+    return scores, complete
+
+
 def _candidate_meal_ids(ingredients: Iterable[str], limit_per_ingredient: int = 20) -> set[str]:
-    meal_ids: set[str] = set()
-    for ingredient in ingredients:
-        meals = api_themealdb.filter_by_ingredient(ingredient)
-        for meal in meals[:limit_per_ingredient]:
-            meal_id = meal.get("idMeal")
-            if meal_id:
-                meal_ids.add(meal_id)
-    return meal_ids
-
-
-def _match_themealdb(inventory: list[str], inventory_set: set[str], max_missing: int) -> list[RecipeMatch]:
-    candidate_ids = sorted(_candidate_meal_ids(inventory))
+    scores, _ = _candidate_scores(ingredients, limit_per_ingredient)
+    return set(scores)
+
+
+def _lookup_with_fallback(
+    meal_id: str, deadline: float | None = None
+) -> tuple[dict[str, Any] | None, bool]:
+    with fetch_scheduler.deadline_scope(deadline), tracing.span("lookup_meal"):
+        if api_themealdb.is_available():
+            try:
+                return api_themealdb.lookup_meal(meal_id), False
+            except fetch_scheduler.FetchUnavailable:
+                tracing.incr("match.cache_only_fallbacks")
+        meal = api_themealdb.lookup_meal(meal_id, cache_only=True)
+    if meal is None:
+        tracing.incr("match.skipped")
+        return None, True
+    return meal, False
+
+
+def _match_themealdb(
+    inventory: list[str],
+    inventory_set: set[str],
+    max_missing: int,
+    deadline: float | None = None,
+) -> tuple[list[RecipeMatch], bool]:
+    with fetch_scheduler.deadline_scope(deadline):
+        scores, complete = _candidate_scores(inventory)
+    # Meals that share the most ingredients with the fridge are fetched first,
+    # so a run cut short by the deadline still has the best candidates.
+    candidate_ids = sorted(scores, key=lambda meal_id: (-scores[meal_id], meal_id))
     results: list[RecipeMatch] = []
 
     if not candidate_ids:
-        return results
-
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        future_map = {
-            executor.submit(api_themealdb.lookup_meal, meal_id): meal_id
-            for meal_id in candidate_ids
-        }
-        for future in as_completed(future_map):
-            meal_id = future_map[future]
+        return results, complete
+
+    def collect(meal_id: str, meal: dict[str, Any] | None) -> None:
+        match = _score_cached_meal(meal_id, meal, inventory_set, max_missing)
+        if match is not None:
+            results.append(match)
+
+    executor = ThreadPoolExecutor(max_workers=8)
+    future_map = {
+        executor.submit(tracing.propagate(_lookup_with_fallback), meal_id, deadline): meal_id
+        for meal_id in candidate_ids
+    }
+    done: set[Future] = set()
+    try:
+        pending = len(future_map)
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        for future in as_completed(future_map, timeout=timeout):
+            done.add(future)
+            pending -= 1
+            tracing.observe("pool.queue_depth", max(pending - 8, 0), tracing.DEPTH_BUCKETS)
             try:
-                meal = future.result()
+                meal, skipped = future.result()
             except Exception:
+                tracing.incr("match.lookup_errors")
+                complete = False
                 continue
-            if not meal:
+            if skipped:
+                complete = False
                 continue
-            category = (meal.get("strCategory") or "").strip().lower()
-            if category in _EXCLUDE_CATEGORIES:
-                continue
-            raw_ingredients = api_themealdb.parse_ingredients(meal)
-            ingredients = _normalize_list(raw_ingredients)
-            missing = [i for i in ingredients if i not in inventory_set and i not in _IGNORE_SPICES]
-            if len(missing) <= max_missing:
-                results.append(
-                    RecipeMatch(
-                        id=meal_id,
-                        name=meal.get("strMeal", "Unknown"),
-                        thumbnail=meal.get("strMealThumb", ""),
-                        ingredients=ingredients,
-                        missing=missing,
-                        source=SOURCE_MEALDB,
-                        details_url=f"https://www.themealdb.com/meal/{meal_id}",
-                    )
-                )
-    return results
+            collect(future_map[future], meal)
+    except FuturesTimeout:
+        tracing.incr("match.deadline_hits")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Past the deadline: stop waiting on HTTP, but the candidates still queued
+    # or in flight are usually in SQLite already and cost milliseconds to read.
+    for future, meal_id in future_map.items():
+        if future in done:
+            continue
+        with tracing.span("lookup_meal"):
+            meal = api_themealdb.lookup_meal(meal_id, cache_only=True)
+        if meal is None:
+            tracing.incr("match.skipped")
+            complete = False
+            continue
+        collect(meal_id, meal)
+    return results, complete
 
 
-def match_recipes(
-    inventory: Iterable[str], max_missing: int = 3, sources: Iterable[str] | None = None
-) -> list[RecipeMatch]:
+def match_recipes_within_budget(
+    inventory: Iterable[str],
+    max_missing: int = 3,
+    sources: Iterable[str] | None = None,
+    budget_s: float | None = MATCH_BUDGET_SECONDS,
+) -> tuple[list[RecipeMatch], bool]:
     normalized_inventory = _normalize_list(inventory)
     if not normalized_inventory:
-        return []
+        return [], True
 
+    deadline = None if budget_s is None else time.monotonic() + budget_s
     inventory_set = set(normalized_inventory)
     selected_sources = set(sources) if sources else {SOURCE_MEALDB}
     results: list[RecipeMatch] = []
+    complete = True
 
     if SOURCE_MEALDB in selected_sources:
-        results.extend(_match_themealdb(normalized_inventory, inventory_set, max_missing))
+        mealdb_results, complete = _match_themealdb(
+            normalized_inventory, inventory_set, max_missing, deadline
+        )
+        results.extend(mealdb_results)
 
-    results.sort(key=lambda r: (len(r.missing), r.name.lower(), r.source))
+    with tracing.span("sort"):
+        sort_matches(results)
+    return results, complete
+
+
+def match_recipes(
+    inventory: Iterable[str],
+    max_missing: int = 3,
+    sources: Iterable[str] | None = None,
+    budget_s: float | None = None,
+) -> list[RecipeMatch]:
+    results, _ = match_recipes_within_budget(inventory, max_missing, sources, budget_s)
     return results
 
 
-def match_recipes_by_ingredient(required: str, inventory: Iterable[str]) -> list[RecipeMatch]:
+def match_recipes_by_ingredient_within_budget(
+    required: str,
+    inventory: Iterable[str],
+    budget_s: float | None = MATCH_BUDGET_SECONDS,
+) -> tuple[list[RecipeMatch], bool]:
     normalized_required = normalize_item(required)
     if not normalized_required:
-        return []
+        return [], True
 
     normalized_inventory = _normalize_list(inventory)
     inventory_set = set(normalized_inventory)
 
+    deadline = None if budget_s is None else time.monotonic() + budget_s
     results: list[RecipeMatch] = []
-    meals = api_themealdb.filter_by_ingredient(normalized_required)
+    with fetch_scheduler.deadline_scope(deadline):
+        meals, skipped = _filter_with_fallback(normalized_required)
+    complete = not skipped
     candidate_ids = [meal.get("idMeal") for meal in meals if meal.get("idMeal")]
 
     for meal_id in candidate_ids:
-        meal = api_themealdb.lookup_meal(meal_id)
-        if not meal:
+        try:
+            meal, skipped = _lookup_with_fallback(meal_id, deadline)
+        except Exception:
+            tracing.incr("match.lookup_errors")
+            complete = False
             continue
-        category = (meal.get("strCategory") or "").strip().lower()
-        if category in _EXCLUDE_CATEGORIES:
+        if skipped:
+            complete = False
             continue
-        raw_ingredients = api_themealdb.parse_ingredients(meal)
-        ingredients = _normalize_list(raw_ingredients)
-        missing = [i for i in ingredients if i not in inventory_set and i not in _IGNORE_SPICES]
-        results.append(
-            RecipeMatch(
-                id=meal_id,
-                name=meal.get("strMeal", "Unknown"),
-                thumbnail=meal.get("strMealThumb", ""),
-                ingredients=ingredients,
-                missing=missing,
-                source=SOURCE_MEALDB,
-                details_url=f"https://www.themealdb.com/meal/{meal_id}",
-            )
-        )
+        match = _score_cached_meal(meal_id, meal, inventory_set, max_missing=None)
+        if match is not None:
+            results.append(match)
 
     results.sort(key=lambda r: (r.name.lower(), r.source))
+    return results, complete
+
+
+def match_recipes_by_ingredient(required: str, inventory: Iterable[str]) -> list[RecipeMatch]:
+    results, _ = match_recipes_by_ingredient_within_budget(required, inventory, budget_s=None)
     return results
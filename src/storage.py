@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from types import ModuleType
+
+from . import config
+
+
+@lru_cache(maxsize=1)
+def remote_store() -> ModuleType | None:
+    if not (config.get("SUPABASE_URL") and config.get("SUPABASE_ANON_KEY")):
+        return None
+    from . import supabase_store
+
+    return supabase_store
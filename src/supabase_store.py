@@ -1,49 +1,88 @@
 from __future__ import annotations
 
-import os
 from functools import lru_cache
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable
 
-from dotenv import load_dotenv
-from supabase import Client, create_client
+from . import config, storage, sync
 
-load_dotenv()
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Postgres error code PostgREST reports when a selected column doesn't exist.
+UNDEFINED_COLUMN = "42703"
 
 
 def is_enabled() -> bool:
-    return bool(os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_ANON_KEY"))
+    return storage.remote_store() is not None
 
 
 @lru_cache(maxsize=1)
 def _client() -> Client:
-    url = os.getenv("SUPABASE_URL", "")
-    key = os.getenv("SUPABASE_ANON_KEY", "")
-    return create_client(url, key)
+    from supabase import create_client
+
+    return create_client(config.get("SUPABASE_URL"), config.get("SUPABASE_ANON_KEY"))
+
+
+class SupabaseBackend:
+    def __init__(self) -> None:
+        self._versioned: dict[str, bool] = {}
+
+    def fetch(self, table: str) -> list[str]:
+        response = _client().table(table).select("item").execute()
+        return [row["item"] for row in response.data or [] if row.get("item")]
+
+    def version(self, table: str) -> tuple[int | None, str | None] | None:
+        # Row count plus the newest updated_at catches inserts and deletes
+        # without reading the table. Tables created without an updated_at
+        # column fall back to a full read per poll; any other error is raised
+        # so a transient failure doesn't disable versioning for good.
+        from postgrest.exceptions import APIError
+
+        if self._versioned.get(table) is False:
+            return None
+        try:
+            response = (
+                _client()
+                .table(table)
+                .select("updated_at", count="exact")
+                .order("updated_at", desc=True)
+                .limit(1)
+                .execute()
+            )
+        except APIError as exc:
+            if exc.code != UNDEFINED_COLUMN:
+                raise
+            self._versioned[table] = False
+            return None
+        self._versioned[table] = True
+        newest = response.data[0]["updated_at"] if response.data else None
+        return response.count, newest
+
+    def insert(self, table: str, items: list[str]) -> None:
+        payload = [{"item": item} for item in items]
+        _client().table(table).upsert(payload, on_conflict="item").execute()
+
+    def delete(self, table: str, items: list[str]) -> None:
+        _client().table(table).delete().in_("item", items).execute()
+
+
+@lru_cache(maxsize=None)
+def _synced(table: str) -> sync.SyncedTable:
+    poll_interval = float(config.get("SUPABASE_POLL_SECONDS", "2"))
+    return sync.SyncedTable(SupabaseBackend(), table, poll_interval=poll_interval)
 
 
 def list_items(table: str) -> list[str]:
-    response = _client().table(table).select("item").execute()
-    data = response.data or []
-    return sorted({row["item"].strip().lower() for row in data if row.get("item")})
+    return _synced(table).items()
 
 
 def add_item(table: str, item: str) -> None:
-    cleaned = item.strip().lower()
-    if not cleaned:
-        return
-    _client().table(table).upsert({"item": cleaned}, on_conflict="item").execute()
+    _synced(table).add(item)
 
 
 def remove_item(table: str, item: str) -> None:
-    cleaned = item.strip().lower()
-    if not cleaned:
-        return
-    _client().table(table).delete().eq("item", cleaned).execute()
+    _synced(table).remove(item)
 
 
 def replace_items(table: str, items: Iterable[str]) -> None:
-    cleaned = sorted({item.strip().lower() for item in items if item.strip()})
-    _client().table(table).delete().neq("item", "").execute()
-    if cleaned:
-        payload = [{"item": item} for item in cleaned]
-        _client().table(table).upsert(payload, on_conflict="item").execute()
+    _synced(table).replace(items)
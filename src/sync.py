@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Hashable, Iterable, Protocol
+
+# Marks the remote version as unknown after our own write, so the next read
+# re-checks the table instead of trusting a version that may already include
+# someone else's change.
+_STALE = object()
+
+
+def clean_items(items: Iterable[str]) -> set[str]:
+    return {item.strip().lower() for item in items if item.strip()}
+
+
+class Backend(Protocol):
+    def fetch(self, table: str) -> list[str]: ...
+
+    # Any value that changes whenever the table changes, or None when the
+    # backend can't tell (the snapshot is then re-read on every poll).
+    def version(self, table: str) -> Hashable | None: ...
+
+    def insert(self, table: str, items: list[str]) -> None: ...
+
+    def delete(self, table: str, items: list[str]) -> None: ...
+
+
+class SyncedTable:
+    def __init__(self, backend: Backend, table: str, poll_interval: float = 2.0) -> None:
+        self.backend = backend
+        self.table = table
+        self.poll_interval = poll_interval
+        self._snapshot: set[str] | None = None
+        self._version: Hashable | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self, force: bool = False) -> set[str]:
+        now = time.monotonic()
+        if self._snapshot is not None and not force and now - self._checked_at < self.poll_interval:
+            return self._snapshot
+        version = self.backend.version(self.table)
+        if self._snapshot is None or version is None or version != self._version:
+            self._snapshot = clean_items(self.backend.fetch(self.table))
+        self._version = version
+        self._checked_at = now
+        return self._snapshot
+
+    def _commit(self, to_insert: set[str], to_delete: set[str]) -> None:
+        if to_delete:
+            self.backend.delete(self.table, sorted(to_delete))
+            if self._snapshot is not None:
+                self._snapshot -= to_delete
+        if to_insert:
+            self.backend.insert(self.table, sorted(to_insert))
+            if self._snapshot is not None:
+                self._snapshot |= to_insert
+        if to_insert or to_delete:
+            self._version = _STALE
+            self._checked_at = 0.0
+
+    def items(self) -> list[str]:
+        with self._lock:
+            return sorted(self._refresh())
+
+    # Single-row writes are idempotent upserts/deletes, so they are always sent:
+    # the snapshot may be up to poll_interval old and can't be trusted to skip them.
+    def add(self, item: str) -> None:
+        cleaned = clean_items([item])
+        with self._lock:
+            self._commit(cleaned, set())
+
+    def remove(self, item: str) -> None:
+        cleaned = clean_items([item])
+        with self._lock:
+            self._commit(set(), cleaned)
+
+    def replace(self, items: Iterable[str]) -> None:
+        wanted = clean_items(items)
+        with self._lock:
+            current = self._refresh(force=True)
+            self._commit(wanted - current, current - wanted)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
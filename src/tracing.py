@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Iterator
+
+from . import config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+_NULL_SPAN = nullcontext()
+
+# The active run lives in a context variable, so concurrent Streamlit sessions
+# (one script thread each) never see each other's runs. Worker threads pick it
+# up through propagate().
+_current: contextvars.ContextVar[Run | None] = contextvars.ContextVar("trace_run", default=None)
+_lock = threading.Lock()
+
+
+@dataclass
+class Histogram:
+    buckets: tuple[float, ...]
+    counts: list[int]
+    total: float = 0.0
+    count: int = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+@dataclass
+class SpanRecord:
+    name: str
+    start: float
+    duration: float
+    thread: str
+
+
+@dataclass
+class Run:
+    name: str
+    started_at: float = field(default_factory=time.time)
+    origin: float = field(default_factory=time.perf_counter)
+    duration: float = 0.0
+    spans: list[SpanRecord] = field(default_factory=list)
+    counters: dict[str, float] = field(default_factory=dict)
+    histograms: dict[str, Histogram] = field(default_factory=dict)
+
+    def breakdown(self) -> list[dict[str, float | int | str]]:
+        totals: dict[str, list[float]] = {}
+        for span in self.spans:
+            entry = totals.setdefault(span.name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += span.duration
+            entry[2] = max(entry[2], span.duration)
+        rows = [
+            {"span": name, "count": int(count), "total_s": total, "max_s": longest}
+            for name, (count, total, longest) in totals.items()
+        ]
+        rows.sort(key=lambda row: row["total_s"], reverse=True)
+        return rows
+
+    def hit_ratios(self) -> dict[str, float]:
+        # A tier reports either hit/miss pairs or lookup/miss pairs (the
+        # in-memory lru_cache only sees its misses).
+        tiers = {key.split(".")[1] for key in self.counters if key.startswith("cache.")}
+        ratios: dict[str, float] = {}
+        for tier in sorted(tiers):
+            misses = self.counters.get(f"cache.{tier}.miss", 0)
+            lookups = self.counters.get(f"cache.{tier}.lookup")
+            if lookups is None:
+                lookups = self.counters.get(f"cache.{tier}.hit", 0) + misses
+            if lookups:
+                ratios[tier] = (lookups - misses) / lookups
+        return ratios
+
+
+def enabled_by_default() -> bool:
+    return config.get("RECIPE_TRACE").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def is_active() -> bool:
+    return _current.get() is not None
+
+
+@contextmanager
+def _run(name: str) -> Iterator[Run]:
+    current = Run(name)
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        current.duration = time.perf_counter() - current.origin
+        _current.reset(token)
+
+
+def run(name: str, enabled: bool | None = None):
+    if enabled is None:
+        enabled = enabled_by_default()
+    if not enabled:
+        return _NULL_SPAN
+    return _run(name)
+
+
+def propagate(fn: Callable[..., Any]) -> Callable[..., Any]:
+    if _current.get() is None:
+        return fn
+    return partial(contextvars.copy_context().run, fn)
+
+
+@contextmanager
+def _span(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        current = _current.get()
+        if current is not None:
+            with _lock:
+                current.spans.append(
+                    SpanRecord(
+                        name=name,
+                        start=start - current.origin,
+                        duration=end - start,
+                        thread=threading.current_thread().name,
+                    )
+                )
+
+
+def span(name: str):
+    if _current.get() is None:
+        return _NULL_SPAN
+    return _span(name)
+
+
+def incr(name: str, amount: float = 1) -> None:
+    current = _current.get()
+    if current is None:
+        return
+    with _lock:
+        current.counters[name] = current.counters.get(name, 0) + amount
+
+
+def observe(name: str, value: float, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+    current = _current.get()
+    if current is None:
+        return
+    with _lock:
+        histogram = current.histograms.get(name)
+        if histogram is None:
+            histogram = Histogram(buckets=buckets, counts=[0] * len(buckets))
+            current.histograms[name] = histogram
+        histogram.observe(value)
+
+
+def to_jsonl(run: Run) -> str:
+    lines = [
+        {
+            "type": "run",
+            "name": run.name,
+            "started_at": run.started_at,
+            "duration": run.duration,
+        }
+    ]
+    for record in run.spans:
+        lines.append(
+            {
+                "type": "span",
+                "name": record.name,
+                "start": record.start,
+                "duration": record.duration,
+                "thread": record.thread,
+            }
+        )
+    for name, value in sorted(run.counters.items()):
+        lines.append({"type": "counter", "name": name, "value": value})
+    for name, histogram in sorted(run.histograms.items()):
+        lines.append(
+            {
+                "type": "histogram",
+                "name": name,
+                "buckets": list(histogram.buckets),
+                "counts": histogram.counts,
+                "sum": histogram.total,
+                "count": histogram.count,
+            }
+        )
+    return "\n".join(json.dumps(line) for line in lines) + "\n"
+
+
+def _metric_name(name: str) -> str:
+    return "recipe_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def to_prometheus(run: Run) -> str:
+    out: list[str] = []
+    out.append("# TYPE recipe_run_duration_seconds gauge")
+    out.append(f'recipe_run_duration_seconds{{run="{run.name}"}} {run.duration}')
+
+    breakdown = run.breakdown()
+    if breakdown:
+        out.append("# TYPE recipe_span_seconds summary")
+        for row in breakdown:
+            out.append(f'recipe_span_seconds_sum{{span="{row["span"]}"}} {row["total_s"]}')
+            out.append(f'recipe_span_seconds_count{{span="{row["span"]}"}} {row["count"]}')
+
+    for name, value in sorted(run.counters.items()):
+        metric = _metric_name(name) + "_total"
+        out.append(f"# TYPE {metric} counter")
+        out.append(f"{metric} {value}")
+
+    for name, histogram in sorted(run.histograms.items()):
+        metric = _metric_name(name)
+        out.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            out.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+        out.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+        out.append(f"{metric}_sum {histogram.total}")
+        out.append(f"{metric}_count {histogram.count}")
+    return "\n".join(out) + "\n"